@@ -12,7 +12,8 @@ class SimpleAgent(BaseAgent):
 
     def get_response(self, prompt: str) -> str:
         # Extract available cards from prompt
-        cards_section = prompt.split("Available Cards:")[1].split("Your Strategy Notes")[0]
+        # Available Cards is the last section of the prompt
+        cards_section = prompt.partition("Available Cards:")[2]
         num_cards = len(cards_section.strip().split('\n'))
         
         # Choose a random card from available ones
@@ -112,7 +113,7 @@ def run_game_with_logging(game: InfiniteContractGame, max_turns: int):
         print(f"Player: {current_turn.player_name}")
         print(f"Thought Process:\n{current_turn.thought_process}")
         print(f"Contract:\n{current_turn.contract_state}")
-        print(f"Variables: {current_turn.variables}")
+        print(f"Variables: {current_turn.variables_dict}")
         print("-" * 50)
 
 if __name__ == "__main__":
@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
+import asyncio
+from typing import Dict, Any, List
 
 class BaseAgent(ABC):
     """Base class for game agents"""
@@ -15,6 +16,22 @@ class BaseAgent(ABC):
         """Generate a response to the game prompt"""
         pass
 
+    async def get_response_async(self, prompt: str) -> str:
+        """Generate a response without blocking the event loop"""
+        return await asyncio.to_thread(self.get_response, prompt)
+
+    def get_turn_response(self, static_block: str, dynamic_block: str) -> str:
+        """Respond to a turn prompt split into an invariant prefix and per-turn state.
+        
+        Agents that talk to a provider with prompt caching can override this to
+        send static_block as a cacheable prefix.
+        """
+        return self.get_response(static_block + dynamic_block)
+
+    async def get_turn_response_async(self, static_block: str, dynamic_block: str) -> str:
+        """Async counterpart of get_turn_response"""
+        return await self.get_response_async(static_block + dynamic_block)
+
     def update_memory(self, turn_result: Dict[str, Any]):
         """Update agent's memory with turn results"""
         if 'scratch_pad' in turn_result:
@@ -1,6 +1,6 @@
 from typing import Dict, Any, Optional
 from .base_agent import BaseAgent
-from litellm import completion
+from litellm import completion, acompletion
 from dotenv import load_dotenv
 import os
 
@@ -39,29 +39,68 @@ class LMAgent(BaseAgent):
         
     def get_response(self, prompt: str) -> str:
         """Get move decision from language model"""
-        messages = [
-            {"role": "system", "content": self.system_prompt},
-            {"role": "user", "content": prompt}
-        ]
-        
+        return self._complete(self._completion_kwargs(prompt))
+
+    async def get_response_async(self, prompt: str) -> str:
+        """Get move decision from language model without blocking the event loop"""
+        return await self._complete_async(self._completion_kwargs(prompt))
+
+    def get_turn_response(self, static_block: str, dynamic_block: str) -> str:
+        """Get move decision, sending the static block as a cacheable system prefix"""
+        return self._complete(self._completion_kwargs(dynamic_block, static_block))
+
+    async def get_turn_response_async(self, static_block: str, dynamic_block: str) -> str:
+        """Async counterpart of get_turn_response"""
+        return await self._complete_async(self._completion_kwargs(dynamic_block, static_block))
+
+    def _complete(self, request: Dict[str, Any]) -> str:
         try:
-            # Remove any model-specific kwargs that might not be supported
-            kwargs = {k: v for k, v in self.model_kwargs.items() 
-                      if k in ['temperature', 'max_tokens']}
-            
-            response = completion(
-                model=self.model,
-                messages=messages,
-                temperature=self.temperature,
-                max_tokens=self.max_tokens,
-                **kwargs
-            )
-            
+            response = completion(**request)
             return response.choices[0].message.content
             
         except Exception as e:
             # Log the error and raise with more context
             raise RuntimeError(f"Error getting LLM response: {str(e)}")
+
+    async def _complete_async(self, request: Dict[str, Any]) -> str:
+        try:
+            response = await acompletion(**request)
+            return response.choices[0].message.content
+            
+        except Exception as e:
+            raise RuntimeError(f"Error getting LLM response: {str(e)}")
+
+    def _completion_kwargs(self, prompt: str, static_block: Optional[str] = None) -> Dict[str, Any]:
+        """Build the keyword arguments for a completion request"""
+        system_content: Any = self.system_prompt
+        if static_block is not None:
+            system_content = f"{self.system_prompt}\n{static_block}"
+            if self._supports_prompt_caching():
+                # Mark the invariant prefix so the provider can reuse it across turns;
+                # other providers may only accept a plain string system message
+                system_content = [{"type": "text", "text": system_content,
+                                   "cache_control": {"type": "ephemeral"}}]
+        
+        messages = [
+            {"role": "system", "content": system_content},
+            {"role": "user", "content": prompt}
+        ]
+        
+        # Remove any model-specific kwargs that might not be supported
+        kwargs = {k: v for k, v in self.model_kwargs.items() 
+                  if k in ['temperature', 'max_tokens']}
+        
+        return {
+            "model": self.model,
+            "messages": messages,
+            "temperature": self.temperature,
+            "max_tokens": self.max_tokens,
+            **kwargs
+        }
+
+    def _supports_prompt_caching(self) -> bool:
+        """Anthropic models accept cache_control markers on content blocks"""
+        return self.model.startswith(('claude', 'haiku', 'anthropic/'))
         
     def _create_system_prompt(self) -> str:
         return f"""You are playing the Infinite Contract Game as {self.name}. 
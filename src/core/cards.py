@@ -1,6 +1,6 @@
 from enum import Enum
 from dataclasses import dataclass
-from typing import List
+from typing import Dict, List
 
 class CardType(Enum):
     AGGRESSIVE_X = "aggressive_x"
@@ -10,7 +10,7 @@ class CardType(Enum):
     STRATEGIC = "strategic"
     UTILITY = "utility"
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Card:
     id: str
     name: str
@@ -22,16 +22,21 @@ class Card:
 class CardLibrary:
     def __init__(self):
         self.cards = {}
+        self._cards_by_type: Dict[CardType, List[Card]] = {}
         self._initialize_cards()
         
     def add_card(self, card: Card):
+        previous = self.cards.get(card.id)
+        if previous is not None:
+            self._cards_by_type[previous.card_type].remove(previous)
         self.cards[card.id] = card
+        self._cards_by_type.setdefault(card.card_type, []).append(card)
         
     def get_card(self, card_id: str) -> Card:
         return self.cards.get(card_id)
         
     def get_cards_by_type(self, card_type: CardType) -> List[Card]:
-        return [card for card in self.cards.values() if card.card_type == card_type]
+        return list(self._cards_by_type.get(card_type, ()))
         
     def _initialize_cards(self):
         # X-focused cards
@@ -1,19 +1,150 @@
-from typing import List, Dict, Any, Optional
-from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Callable, Iterable, NamedTuple, Tuple
+from functools import lru_cache
 import ast
 from .cards import Card
+from .history import Variables
 
-@dataclass
-class ContractState:
-    code: List[str]
+# Variables every contract starts with; victory conditions may only refer to these
+_VARIABLE_NAMES = frozenset({'x', 'y', 'z'})
+_INITIAL_VARIABLES = {'x': 1, 'y': 1, 'z': 1}
+
+# Syntax allowed in a victory condition: comparisons of variables and constants
+_VICTORY_NODES = (
+    ast.Expression, ast.Compare, ast.BoolOp, ast.And, ast.Or,
+    ast.UnaryOp, ast.USub, ast.UAdd, ast.Name, ast.Load, ast.Constant,
+    ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE,
+)
+
+class _VariableLookup(ast.NodeTransformer):
+    """Rewrite each variable name into a subscript of the variables mapping `v`"""
+    def visit_Name(self, node: ast.Name) -> ast.AST:
+        return ast.copy_location(
+            ast.Subscript(value=ast.Name(id='v', ctx=ast.Load()),
+                          slice=ast.Constant(node.id),
+                          ctx=ast.Load()),
+            node
+        )
+
+def _never_satisfied(variables: Dict[str, Any]) -> bool:
+    return False
+
+def _is_comparison(node: ast.AST) -> bool:
+    """True for a comparison, or an and/or whose operands are all comparisons"""
+    if isinstance(node, ast.BoolOp):
+        return all(_is_comparison(value) for value in node.values)
+    return isinstance(node, ast.Compare)
+
+@lru_cache(maxsize=128)
+def compile_victory_condition(condition: str) -> Callable[[Dict[str, Any]], bool]:
+    """Compile a victory condition such as "x >= 5" into a function of the variables.
+    
+    Conditions that cannot be parsed, use anything besides comparisons of
+    variables and numbers, or refer to unknown variables compile to a function
+    that is never satisfied. The function is also unsatisfied when a variable
+    has been deleted or holds a value that cannot be compared, e.g. after
+    `del x` or `x = []`. Results are cached per condition string.
+    """
+    try:
+        tree = ast.parse(condition.strip(), mode="eval")
+    except SyntaxError:
+        return _never_satisfied
+    
+    if not _is_comparison(tree.body):
+        return _never_satisfied
+    for node in ast.walk(tree):
+        if not isinstance(node, _VICTORY_NODES):
+            return _never_satisfied
+        if isinstance(node, ast.Name) and node.id not in _VARIABLE_NAMES:
+            return _never_satisfied
+        if isinstance(node, ast.Constant) and not isinstance(node.value, (int, float)):
+            return _never_satisfied
+    
+    body = _VariableLookup().visit(tree.body)
+    func = ast.Expression(body=ast.Lambda(
+        args=ast.arguments(posonlyargs=[], args=[ast.arg(arg='v')], vararg=None,
+                           kwonlyargs=[], kw_defaults=[], kwarg=None, defaults=[]),
+        body=body
+    ))
+    code = compile(ast.fix_missing_locations(func), "<victory>", "eval")
+    check = eval(code, {"__builtins__": {}})
+    
+    def satisfied(variables: Dict[str, Any]) -> bool:
+        try:
+            return bool(check(variables))
+        except (KeyError, TypeError):
+            return False
+    return satisfied
+
+# Builtins are stripped from contracts, but these are refused outright rather than left to fail in exec
+_FORBIDDEN_CALLS = frozenset({
+    'eval', 'exec', 'compile', '__import__', 'globals', 'locals', 'vars',
+    'getattr', 'setattr', 'delattr', 'open',
+})
+
+class _CodeValidator(ast.NodeVisitor):
+    """Reject contract lines that try to reach outside the contract's variables"""
+    def __init__(self):
+        # Nesting depth of comprehensions around the node being visited
+        self._comprehension_depth = 0
+
+    def visit_ListComp(self, node: ast.AST) -> None:
+        self._comprehension_depth += 1
+        self.generic_visit(node)
+        self._comprehension_depth -= 1
+
+    visit_SetComp = visit_DictComp = visit_GeneratorExp = visit_ListComp
+
+    def visit_NamedExpr(self, node: ast.NamedExpr) -> None:
+        # A walrus inside a comprehension binds in the enclosing scope, which for
+        # a contract line is its globals rather than the variables mapping
+        if self._comprehension_depth:
+            raise ValueError("Assignment expressions inside comprehensions are not allowed in a contract")
+        self.generic_visit(node)
+
+    def visit_Import(self, node: ast.AST) -> None:
+        raise ValueError("Imports are not allowed in a contract")
+
+    visit_ImportFrom = visit_Import
+
+    def visit_Global(self, node: ast.AST) -> None:
+        raise ValueError("global and nonlocal statements are not allowed in a contract")
+
+    visit_Nonlocal = visit_Global
+
+    def visit_Call(self, node: ast.Call) -> None:
+        if isinstance(node.func, ast.Name) and node.func.id in _FORBIDDEN_CALLS:
+            raise ValueError(f"Calling {node.func.id}() is not allowed in a contract")
+        self.generic_visit(node)
+
+    def visit_Name(self, node: ast.Name) -> None:
+        if node.id.startswith('__'):
+            raise ValueError(f"Dunder name {node.id} is not allowed in a contract")
+
+    def visit_Attribute(self, node: ast.Attribute) -> None:
+        if node.attr.startswith('__'):
+            raise ValueError(f"Dunder attribute {node.attr} is not allowed in a contract")
+        self.generic_visit(node)
+
+@lru_cache(maxsize=1024)
+def _compile_line(code: str):
+    """Validate and compile a contract line once; cards reuse the same few lines over and over"""
+    tree = ast.parse(code, "<contract>", "exec")
+    _CodeValidator().visit(tree)
+    return compile(tree, "<contract>", "exec")
+
+class ContractState(NamedTuple):
+    """Snapshot of a contract, saved before cards are applied"""
+    code: Tuple[str, ...]
     variables: Dict[str, Any]
     execution_order: List[int]
 
 class CodeContract:
     def __init__(self):
-        self.current_code: List[str] = []
-        self.variables: Dict[str, Any] = {'x': 1, 'y': 1, 'z': 1}
+        # Immutable so turn history and saved states can share it without copying
+        self.current_code: Tuple[str, ...] = ()
+        self.variables: Dict[str, Any] = dict(_INITIAL_VARIABLES)
         self.execution_order: List[int] = []
+        # Snapshots of (code, variables, execution_order) to roll back to
         self._state_history: List[ContractState] = []
         
     def add_line(self, code: str) -> bool:
@@ -25,24 +156,34 @@ class CodeContract:
 
     def _add_normal_line(self, code: str) -> bool:
         """Add a regular code line to the contract"""
+        return self._add_normal_lines((code,))
+
+    def _add_normal_lines(self, codes: Tuple[str, ...]) -> bool:
+        """Add regular code lines, executing the contract once for all of them"""
+        if not codes:
+            return True
         try:
             # Save current state
             self._save_state()
             
-            # Add line
-            self.current_code.append(code)
-            self.execution_order.append(len(self.current_code) - 1)
+            # Add lines
+            first_index = len(self.current_code)
+            self.current_code += codes
+            self.execution_order.extend(range(first_index, len(self.current_code)))
             
             # Execute contract
-            if not self._execute_contract():
-                self._restore_state()
-                return False
+            if self._execute_contract():
+                return True
                 
-            return True
-            
         except Exception:
-            self._restore_state()
+            pass
+        
+        self._restore_state()
+        if len(codes) == 1:
             return False
+        # Some line broke the contract; add them one by one so only failing lines are dropped
+        results = [self._add_normal_line(code) for code in codes]
+        return all(results)
 
     def _handle_special_command(self, code: str) -> bool:
         """Handle special contract management commands"""
@@ -67,7 +208,7 @@ class CodeContract:
         if not self.current_code:
             return False
         self._save_state()
-        self.current_code.pop()
+        self.current_code = self.current_code[:-1]
         self.execution_order = [i for i in self.execution_order if i < len(self.current_code)]
         return self._execute_contract()
 
@@ -81,7 +222,7 @@ class CodeContract:
                 active_lines.append(line)
                 new_execution_order.append(len(active_lines) - 1)
                 
-        self.current_code = active_lines
+        self.current_code = tuple(active_lines)
         self.execution_order = new_execution_order
         return True
 
@@ -92,96 +233,82 @@ class CodeContract:
 
     def _execute_contract(self) -> bool:
         """Execute the contract safely"""
-        # Reset variables to initial state before executing
-        self.variables = {'x': 1, 'y': 1, 'z': 1}
-        temp_vars = self.variables.copy()
+        # Start from the initial variables; a failed run leaves them reset
+        temp_vars = dict(_INITIAL_VARIABLES)
+        # Fresh globals per run so nothing a line binds there outlives this contract
+        exec_globals = {"__builtins__": {}}
         
         try:
             # Execute each line in order
             for idx in self.execution_order:
                 if idx < len(self.current_code):
-                    exec(self.current_code[idx], {"__builtins__": {}}, temp_vars)
+                    exec(_compile_line(self.current_code[idx]), exec_globals, temp_vars)
             
             self.variables = temp_vars
             return True
             
         except Exception:
+            self.variables = dict(_INITIAL_VARIABLES)
             return False
             
     def _save_state(self):
         """Save current state"""
-        self._state_history.append({
-            'code': self.current_code.copy(),
-            'variables': self.variables.copy(),
-            'execution_order': self.execution_order.copy()
-        })
+        self._state_history.append(
+            ContractState(self.current_code, self.variables.copy(), self.execution_order.copy())
+        )
         
     def _restore_state(self):
         """Restore last valid state"""
         if self._state_history:
-            state = self._state_history.pop()
-            self.current_code = state['code']
-            self.variables = state['variables']
-            self.execution_order = state['execution_order']
-
-    def apply_card(self, card: 'Card') -> None:
-        """Apply a card's code to the contract"""
-        if card.code.startswith('__contract__'):
-            # Handle special utility commands
-            if card.code == "__contract__.pop()":
-                self._remove_last_line()
-            elif card.code == "__contract__.clean()":
-                self._clean_inactive_lines()
-            elif card.code == "__contract__.optimize()":
-                self._optimize_execution_order()
-            elif card.code == "__contract__.clear()":
-                self._clear_all_lines()
-            elif card.code == "__contract__.invert()":
-                self._invert_execution_order()
-        else:
-            # Handle regular code cards
-            self.add_line(card.code)
-            # Execute the entire contract after adding the line
-            self._execute_contract()
+            self.current_code, self.variables, self.execution_order = self._state_history.pop()
+
+    def apply_card(self, card: 'Card') -> bool:
+        """Apply a card's code to the contract; returns whether the card took effect"""
+        # add_line dispatches __contract__ commands and re-executes the contract
+        return self.add_line(card.code)
+
+    def apply_cards(self, cards: Iterable['Card']) -> bool:
+        """Apply cards in order, executing the contract once per run of regular code cards.
+        
+        Ends in the same state as calling apply_card for each card; returns
+        whether every card took effect.
+        """
+        results = []
+        pending: List[str] = []
+        for card in cards:
+            if card.code.startswith("__contract__"):
+                results.append(self._add_normal_lines(tuple(pending)))
+                pending = []
+                results.append(self._handle_special_command(card.code))
+            else:
+                pending.append(card.code)
+        results.append(self._add_normal_lines(tuple(pending)))
+        return all(results)
+
+    def variables_tuple(self) -> Variables:
+        """Snapshot of (x, y, z); cheaper to store per turn than a dict copy.
+        
+        A variable removed by a line such as `del x` is recorded as None.
+        """
+        variables = self.variables
+        return Variables(variables.get('x'), variables.get('y'), variables.get('z'))
 
     def check_victory_condition(self, condition: str) -> bool:
         """Check if the victory condition is met"""
-        try:
-            # Create a copy of variables for safe evaluation
-            vars_copy = self.variables.copy()
-            # Handle greater than or equal conditions
-            if '>=' in condition:
-                var, target = condition.split('>=')
-                var = var.strip()
-                target = int(target.strip())
-                return vars_copy[var] >= target
-            # Handle less than or equal conditions
-            elif '<=' in condition:
-                var, target = condition.split('<=')
-                var = var.strip()
-                target = int(target.strip())
-                return vars_copy[var] <= target
-            # Handle equality conditions
-            elif '==' in condition:
-                var, target = condition.split('==')
-                var = var.strip()
-                target = int(target.strip())
-                return vars_copy[var] == target
-            return False
-        except Exception:
-            return False
+        return compile_victory_condition(condition)(self.variables)
 
     def _clear_all_lines(self) -> bool:
         """Clear all lines from the contract"""
         self._save_state()
-        self.current_code = []
+        self.current_code = ()
         self.execution_order = []
         return True
 
     def _invert_execution_order(self) -> bool:
         """Invert the execution order of all lines"""
         self._save_state()
-        self.execution_order = list(reversed(self.execution_order))
+        # _save_state copied the old order, so it can be reversed in place
+        self.execution_order.reverse()
         return self._execute_contract()
 
     def _remove_line(self, index: int) -> bool:
@@ -191,7 +318,7 @@ class CodeContract:
         
         self._save_state()
         # Remove the line
-        self.current_code.pop(index)
+        self.current_code = self.current_code[:index] + self.current_code[index + 1:]
         # Update execution order by removing the index and shifting remaining indices
         self.execution_order = [i if i < index else i - 1 for i in self.execution_order if i != index]
         return self._execute_contract()
\ No newline at end of file
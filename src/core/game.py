@@ -1,11 +1,66 @@
-from typing import List, Dict, Any, Optional, Callable
+from typing import List, Dict, Any, Optional, Callable, Iterable, Tuple
 from dataclasses import dataclass
+import asyncio
+import hashlib
+import random
+import re
 
-from .contract import CodeContract
+from .contract import CodeContract, compile_victory_condition
 from .history import GameHistory
 from ..agents.base_agent import BaseAgent
 from .cards import CardLibrary, CardType, Card
 
+# Names used for the two seats in history and logs, indexed by player number
+_PLAYER_NAMES = ('agent1', 'agent2')
+
+# Rendered once per agent in __init__
+_STATIC_PROMPT_TEMPLATE = """
+=== Infinite Contract Game ===
+
+Your Victory Condition: {victory_condition}
+
+Each turn you are shown your strategy notes, the contract, the variable states,
+recent game history and the cards you may play.
+
+Think through your move, considering:
+1. Current contract state
+2. Execution order of code
+3. Previous moves and their effects
+4. Path to victory condition
+
+Format your response as:
+SCRATCH PAD:
+[your strategic thinking]
+
+SELECTED CARD: [number]
+"""
+
+# Rendered every turn; sections run from least to most volatile
+_TURN_PROMPT_TEMPLATE = """
+Your Strategy Notes:
+{notes}
+
+Current Contract Contents:
+{contract}
+
+Variable States:
+{variables}
+
+Game History (Last {window} Turns):
+{history}
+
+=== Turn {turn} ===
+
+Available Cards:
+{cards}
+"""
+
+# "SELECTED CARD: <token>" anywhere in a response, tolerant of spacing, case and markdown;
+# the last one is the answer, so a "selected card:" mentioned in the reasoning is ignored
+_SELECTED_CARD_RE = re.compile(r'SELECTED\s*CARD:[^\w\s]*\s*(\S*)', re.I)
+# Start of the optional scratch pad, which runs up to the answer
+_SCRATCH_PAD_RE = re.compile(r'SCRATCH\s*PAD:', re.I)
+
 @dataclass
 class GameConfig:
     max_turns: int = 50
@@ -13,70 +68,123 @@ class GameConfig:
     card_library: CardLibrary = None
     cards_per_turn: int = 3
     get_allowed_cards: Callable[[str], List[CardType]] = None
+    # Maps a game-state fingerprint to (scratch pad text, selected card name);
+    # share one dict across games to reuse responses. None disables caching.
+    response_cache: Optional[Dict[str, Tuple[str, str]]] = None
 
 class InfiniteContractGame:
-    def __init__(self, agent1: BaseAgent, agent2: BaseAgent, config: GameConfig):
+    def __init__(self, agent1: BaseAgent, agent2: BaseAgent, config: GameConfig,
+                 rng: Optional[random.Random] = None):
         self.contract = CodeContract()
         self.history = GameHistory()
-        self.agents = {'agent1': agent1, 'agent2': agent2}
+        self.agents_list: Tuple[BaseAgent, BaseAgent] = (agent1, agent2)
         self.config = config
-        self.current_player = 'agent1'
+        self._victory_fns = tuple(
+            compile_victory_condition(agent.victory_condition) for agent in self.agents_list
+        )
+        # Allowed cards depend only on each agent's fixed target variable
+        self._card_pools = tuple(self._build_card_pool(agent) for agent in self.agents_list)
+        self._static_blocks = tuple(
+            _STATIC_PROMPT_TEMPLATE.format_map({'victory_condition': agent.victory_condition})
+            for agent in self.agents_list
+        )
+        # Index of the player whose turn it is
+        self._cur = 0
+        # Card dealing draws from rng; without one the global random generator is used
+        self._rng = rng if rng is not None else random
+        # Hand dealt to the current player; drawn once per turn by play_turn
+        self.available_cards: List[Card] = []
+
+    @property
+    def current_agent(self) -> BaseAgent:
+        """Agent whose turn it is"""
+        return self.agents_list[self._cur]
+
+    @property
+    def current_player(self) -> str:
+        """Seat name of the player whose turn it is ('agent1' or 'agent2')"""
+        return _PLAYER_NAMES[self._cur]
         
     def create_turn_prompt(self) -> str:
         """Create the prompt for current turn"""
-        agent = self.agents[self.current_player]
-        recent_history = self.history.get_recent_turns(self.config.memory_window)
-        
-        # Get available cards for this turn
-        self.available_cards = self._get_available_cards()
-        
-        return f"""
-=== Infinite Contract Game - Turn {len(self.history.turns) + 1} ===
-
-Current Contract Contents:
-{self._format_contract()}
-
-Variable States:
-{self._format_variables()}
-
-Game History (Last {self.config.memory_window} Turns):
-{self._format_history(recent_history)}
-
-Your Victory Condition: {agent.victory_condition}
+        return self._static_system_block() + self._dynamic_user_block()
 
-Available Cards:
-{self._format_cards()}
-
-Your Strategy Notes:
-{self._format_notes(agent.strategy_notes)}
-
-Think through your move, considering:
-1. Current contract state
-2. Execution order of code
-3. Previous moves and their effects
-4. Path to victory condition
-
-Format your response as:
-SCRATCH PAD:
-[your strategic thinking]
+    def _static_system_block(self) -> str:
+        """Prompt sections that never change for the current agent, suitable for prompt caching"""
+        return self._static_blocks[self._cur]
 
-SELECTED CARD: [number]
-"""
+    def _dynamic_user_block(self, notes: Optional[List[str]] = None) -> str:
+        """Prompt sections that change every turn, ordered from least to most volatile"""
+        if notes is None:
+            notes = self._visible_notes(self.current_agent)
+        recent_history = self.history.get_recent_turns(self.config.memory_window)
+        
+        return _TURN_PROMPT_TEMPLATE.format_map({
+            'turn': len(self.history.turns) + 1,
+            'notes': self._format_notes(notes),
+            'contract': self._format_contract(),
+            'variables': self._format_variables(),
+            'window': self.config.memory_window,
+            'history': self._format_history(recent_history),
+            'cards': self._format_cards(self.available_cards),
+        })
 
     def play_turn(self) -> bool:
         """Execute a single turn"""
-        agent = self.agents[self.current_player]
+        static_block, dynamic_block, cache_key, response = self._prepare_turn()
+        if response is None:
+            response = self.current_agent.get_turn_response(static_block, dynamic_block)
+        return self._apply_turn(response, cache_key)
+
+    async def play_turn_async(self, limiter: Optional[asyncio.Semaphore] = None) -> bool:
+        """Execute a single turn, awaiting the agent's response.
         
-        # Create and send prompt
-        prompt = self.create_turn_prompt()
-        response = agent.get_response(prompt)
+        limiter, when given, is held while the agent is asked, so games sharing
+        it cap how many agent requests are in flight at once.
+        """
+        static_block, dynamic_block, cache_key, response = self._prepare_turn()
+        if response is None:
+            agent = self.current_agent
+            if limiter is None:
+                response = await agent.get_turn_response_async(static_block, dynamic_block)
+            else:
+                async with limiter:
+                    response = await agent.get_turn_response_async(static_block, dynamic_block)
+        return self._apply_turn(response, cache_key)
+
+    def _prepare_turn(self) -> Tuple[str, str, Optional[str], Optional[str]]:
+        """Deal the hand and build the prompt; returns (static, dynamic, cache key, cached response)"""
+        # Deal this turn's cards once; the prompt and move validation both use them
+        self.available_cards = self._get_available_cards()
         
+        # The prompt and the cache key both need the visible notes
+        notes = self._visible_notes(self.current_agent)
+        static_block = self._static_system_block()
+        dynamic_block = self._dynamic_user_block(notes)
+        cache_key = self._response_cache_key(notes)
+        return static_block, dynamic_block, cache_key, self._cached_response(cache_key)
+
+    def _apply_turn(self, response: str, cache_key: Optional[str] = None) -> bool:
+        """Apply the agent's response to the game; returns False once a player has won"""
         # Extract selected card and thought process
-        selected_card = self._extract_selected_card(response)
+        try:
+            scratch_pad, selected_card = self._parse_response(response)
+        except ValueError:
+            selected_card = None
         
         # Apply the selected card
+        success = False
         if selected_card is not None:
-            self.contract.apply_card(self.available_cards[selected_card - 1])
+            card = self.available_cards[selected_card - 1]
+            success = self.contract.apply_card(card)
+            if success:
+                self._cache_response(cache_key, scratch_pad, card)
+        
+        if selected_card is None and self.history.turns:
+            # Nothing was played, so the previous turn's snapshot still holds
+            variables = self.history.turns[-1].variables
+        else:
+            variables = self.contract.variables_tuple()
             
         # Record the turn in history
         self.history.add_turn(
@@ -85,12 +193,13 @@ SELECTED CARD: [number]
             thought_process=response,
             selected_card=selected_card,
             contract_state=self.contract.current_code,
-            variables=self.contract.variables
+            variables=variables,
+            success=success
         )
         
         # Check victory conditions
-        for player_name, agent in self.agents.items():
-            if self.contract.check_victory_condition(agent.victory_condition):
+        for player_name, victory_fn in zip(_PLAYER_NAMES, self._victory_fns):
+            if victory_fn(self.contract.variables):
                 print(f"\n{player_name} has won!")
                 return False
         
@@ -98,21 +207,55 @@ SELECTED CARD: [number]
         self._switch_players()
         return True
 
-    def _extract_selected_card(self, response: str) -> Optional[int]:
-        """Extract the selected card number from the response"""
-        try:
-            parts = response.split("SELECTED CARD:")
-            if len(parts) > 1:
-                card_number = int(parts[1].strip())
-                if 1 <= card_number <= len(self.available_cards):
-                    return card_number
+    async def play_async(self, limiter: Optional[asyncio.Semaphore] = None) -> None:
+        """Play turns until a player wins or the history reaches max_turns"""
+        while len(self.history.turns) < self.config.max_turns:
+            if not await self.play_turn_async(limiter):
+                return
+
+    def _response_cache_key(self, notes: Optional[List[str]] = None) -> Optional[str]:
+        """Fingerprint everything the agent sees this turn and who answers it, ignoring card order and turn number"""
+        if self.config.response_cache is None:
             return None
-        except ValueError:
+        agent = self.current_agent
+        if notes is None:
+            notes = self._visible_notes(agent)
+        recent_history = self.history.get_recent_turns(self.config.memory_window)
+        payload = (
+            self.contract.current_code,
+            self.contract.variables_tuple(),
+            tuple((turn.player_name, turn.selected_card, turn.variables)
+                  for turn in recent_history),
+            tuple(sorted(card.name for card in self.available_cards)),
+            tuple(notes),
+            self.current_player,
+            agent.name,
+            agent.victory_condition,
+            # Agents with the same name may still be different models
+            type(agent).__module__,
+            type(agent).__qualname__,
+            getattr(agent, 'model', None),
+        )
+        return hashlib.blake2b(repr(payload).encode(), digest_size=16).hexdigest()
+
+    def _cached_response(self, cache_key: Optional[str]) -> Optional[str]:
+        """Rebuild a cached response with the card number remapped to this turn's card order"""
+        if cache_key is None or cache_key not in self.config.response_cache:
             return None
+        scratch_pad, card_name = self.config.response_cache[cache_key]
+        for i, card in enumerate(self.available_cards):
+            if card.name == card_name:
+                return f"SCRATCH PAD:\n{scratch_pad}\n\nSELECTED CARD: {i + 1}\n"
+        return None
+
+    def _cache_response(self, cache_key: Optional[str], scratch_pad: str, card: Card) -> None:
+        """Store a valid response keyed by card name rather than card number"""
+        if cache_key is not None:
+            self.config.response_cache[cache_key] = (scratch_pad, card.name)
 
     def _switch_players(self):
         """Switch to the next player"""
-        self.current_player = 'agent2' if self.current_player == 'agent1' else 'agent1'
+        self._cur ^= 1
 
     def _format_contract(self) -> str:
         return "\n".join(f"{i}: {line}" for i, line in enumerate(self.contract.current_code))
@@ -122,38 +265,74 @@ SELECTED CARD: [number]
 
     def _format_history(self, history) -> str:
         return "\n".join(
-            f"Turn {turn.turn_number}: Player {turn.player_name} played card {turn.selected_card} - Variables: {turn.variables}"
+            f"Turn {turn.turn_number}: Player {turn.player_name} played card {turn.selected_card} - Variables: {turn.variables_dict}"
             for turn in history
         )
 
-    def _format_cards(self) -> str:
-        available_cards = self._get_available_cards()
+    def _format_cards(self, cards: List[Card]) -> str:
         return "\n".join(f"{i+1}. {card.name}: {card.description}" 
-                        for i, card in enumerate(available_cards))
+                        for i, card in enumerate(cards))
 
-    def _format_notes(self, notes: List[str]) -> str:
-        return "\n".join(notes[-self.config.memory_window:])
+    def _visible_notes(self, agent: BaseAgent) -> List[str]:
+        """The agent's last memory_window strategy notes, which are all it is shown"""
+        window = self.config.memory_window
+        return agent.strategy_notes[-window:] if window else []
 
-    def _get_available_cards(self) -> List[Card]:
-        """Get available cards for the current player"""
-        agent = self.agents[self.current_player]
+    def _format_notes(self, notes: Iterable[str]) -> str:
+        return "\n".join(notes)
+
+    def _build_card_pool(self, agent: BaseAgent) -> Tuple[List[Card], int]:
+        """Collect the cards an agent may be dealt and how many to deal per turn"""
         # Get allowed card types based on the player's target variable
         allowed_types = self.config.get_allowed_cards(agent.target_var)
         
         all_cards = []
         for card_type in allowed_types:
             all_cards.extend(self.config.card_library.get_cards_by_type(card_type))
-            
+        
+        return all_cards, min(len(all_cards), self.config.cards_per_turn)
+
+    def _get_available_cards(self) -> List[Card]:
+        """Get available cards for the current player"""
         # Randomly select cards_per_turn number of cards
-        import random
-        return random.sample(all_cards, min(len(all_cards), self.config.cards_per_turn))
+        all_cards, hand_size = self._card_pools[self._cur]
+        return self._rng.sample(all_cards, hand_size)
 
-    def _parse_response(self, response: str) -> tuple[str, int]:
+    def _parse_response(self, response: str) -> Tuple[str, int]:
         """Parse agent response into scratch pad and card number"""
-        try:
-            parts = response.split("SELECTED CARD:")
-            scratch_pad = parts[0].replace("SCRATCH PAD:", "").strip()
-            card_number = int(parts[1].strip())
-            return scratch_pad, card_number
-        except Exception as e:
-            raise ValueError(f"Invalid response format: {e}")
\ No newline at end of file
+        match = None
+        for match in _SELECTED_CARD_RE.finditer(response):
+            pass
+        if match is None:
+            raise ValueError("No 'SELECTED CARD:' section found")
+        
+        # Models often echo the template's brackets or add markdown, e.g. "[2]" or "**2**"
+        token = match.group(1).strip('[]().,*')
+        if not token.isdecimal():
+            raise ValueError("Invalid response format: SELECTED CARD must be followed by a number")
+        card_number = int(token)
+        if not 1 <= card_number <= len(self.available_cards):
+            raise ValueError(
+                f"Selected card {card_number} is out of valid range 1-{len(self.available_cards)}"
+            )
+        scratch_pad = ""
+        header = _SCRATCH_PAD_RE.search(response, 0, match.start())
+        if header is not None:
+            # Drop markdown wrapped around the SELECTED CARD header, e.g. "**SELECTED CARD:**"
+            scratch_pad = response[header.end():match.start()].rstrip('*#_').strip()
+        return scratch_pad, card_number
+
+
+async def run_games_async(games: Iterable[InfiniteContractGame],
+                          concurrency: Optional[int] = None) -> None:
+    """Play several independent games concurrently, overlapping agent I/O.
+    
+    Each game advances at its own pace, so a slow agent only holds up its own
+    game; with concurrency set, at most that many agent requests are in flight
+    at once (e.g. a provider rate limit).
+    
+    Each game must own its contract, history and agents; only stateless model
+    clients (and an optional shared response cache) should be shared.
+    """
+    limiter = asyncio.Semaphore(concurrency) if concurrency else None
+    await asyncio.gather(*(game.play_async(limiter) for game in games))
@@ -1,44 +1,149 @@
-from dataclasses import dataclass
-from typing import Dict, List, Optional
+from array import array
+import io
+import json
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, TextIO, Tuple
 from datetime import datetime
 
-@dataclass
+class Variables(NamedTuple):
+    """Values of the contract variables after a turn; None when a variable was deleted"""
+    x: Any
+    y: Any
+    z: Any
+
+# Order of the contract variables in TurnRecord.variables
+VARIABLE_NAMES = Variables._fields
+
+# Per-turn columns kept by GameHistory, in row order, with the array typecode each starts as
+_COLUMN_TYPECODES = (
+    ('turn_number', 'i'), ('player_id', 'B'), ('selected_card', 'i'), ('success', 'b'),
+    ('x', 'q'), ('y', 'q'), ('z', 'q'),
+)
+
+@dataclass(slots=True)
 class TurnRecord:
     turn_number: int
     player_name: str
     thought_process: str
     selected_card: int
-    contract_state: List[str]
-    variables: Dict[str, int]
-    timestamp: datetime = datetime.now()
+    contract_state: Tuple[str, ...]
+    variables: Variables
+    timestamp: Optional[datetime] = field(default_factory=datetime.now)
+    # False when the turn's response was invalid or its card could not be applied
+    success: bool = True
+
+    @property
+    def variables_dict(self) -> Dict[str, int]:
+        """Variables keyed by name, built on demand"""
+        return dict(zip(VARIABLE_NAMES, self.variables))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serialisable form of the record"""
+        return {
+            'turn_number': self.turn_number,
+            'player_name': self.player_name,
+            'thought_process': self.thought_process,
+            'selected_card': self.selected_card,
+            'contract_state': list(self.contract_state),
+            'variables': self.variables_dict,
+            'timestamp': self.timestamp.isoformat() if self.timestamp else None,
+            'success': self.success,
+        }
 
 class GameHistory:
-    def __init__(self):
+    def __init__(self, record_timestamps: bool = True):
+        # Batch simulations can skip the per-turn clock read; timestamps are then None
+        self.record_timestamps = record_timestamps
         self.turns: List[TurnRecord] = []
+        self._turns_by_player: Dict[str, List[TurnRecord]] = defaultdict(list)
+        # Players in order of first appearance; the player_id column indexes this
+        self.player_names: List[str] = []
+        self._player_ids: Dict[str, int] = {}
+        # Column-wise copies of the per-turn data for bulk analytics
+        self._columns: Dict[str, Any] = {
+            name: array(typecode) for name, typecode in _COLUMN_TYPECODES
+        }
         
     def add_turn(self, 
                  turn_number: int,
                  player_name: str,
                  thought_process: str,
                  selected_card: int,
-                 contract_state: List[str],
-                 variables: Dict[str, int]):
+                 contract_state: Tuple[str, ...],
+                 variables: Variables,
+                 success: bool = True):
+        # Turns are numbered consecutively from 1, so turn N lives at index N-1.
+        # Checked only in debug runs; `python -O` strips it from the per-turn path.
+        assert turn_number == len(self.turns) + 1, \
+            f"Expected turn {len(self.turns) + 1}, got turn {turn_number}"
         record = TurnRecord(
             turn_number=turn_number,
             player_name=player_name,
             thought_process=thought_process,
             selected_card=selected_card,
-            contract_state=contract_state.copy(),
-            variables=variables.copy()
+            contract_state=contract_state,
+            variables=variables,
+            timestamp=datetime.now() if self.record_timestamps else None,
+            success=success
         )
+        x, y, z = variables
+        # Cards are numbered from 1, so 0 marks a turn where nothing was played
+        row = (turn_number, self._player_id(player_name), selected_card or 0, success, x, y, z)
         self.turns.append(record)
+        self._turns_by_player[player_name].append(record)
+        for name, value in zip(self._columns, row):
+            column = self._columns[name]
+            try:
+                column.append(value)
+            except (TypeError, OverflowError):
+                # Contract variables can be floats or ints too wide for the
+                # typecode; such a column is kept as a list from then on
+                column = self._columns[name] = list(column)
+                column.append(value)
+    
+    def _player_id(self, player_name: str) -> int:
+        """Small integer id for player_name, assigned on first appearance"""
+        player_id = self._player_ids.get(player_name)
+        if player_id is None:
+            player_id = self._player_ids[player_name] = len(self.player_names)
+            self.player_names.append(player_name)
+        return player_id
     
     def get_player_turns(self, player_name: str) -> List[TurnRecord]:
-        return [turn for turn in self.turns if turn.player_name == player_name]
+        return self._turns_by_player.get(player_name, [])
     
     def get_turn(self, turn_number: int) -> Optional[TurnRecord]:
-        return next((turn for turn in self.turns if turn.turn_number == turn_number), None)
+        if 1 <= turn_number <= len(self.turns):
+            return self.turns[turn_number - 1]
+        return None
     
     def get_recent_turns(self, window: int) -> List[TurnRecord]:
         """Get the most recent n turns from history"""
-        return self.turns[-window:] if self.turns else []
\ No newline at end of file
+        return self.turns[-window:] if self.turns else []
+    
+    def columns(self) -> Dict[str, Sequence]:
+        """Per-turn data as parallel columns, one entry per turn.
+        
+        Columns are array.array buffers, so they can be wrapped without
+        copying (e.g. numpy.frombuffer) for vectorised post-game stats. A
+        column that has held a value its typecode cannot store, such as a
+        float or an int wider than 64 bits, is a list instead. player_id
+        indexes player_names and selected_card is 0 when no card was played.
+        """
+        return dict(self._columns)
+    
+    def stream_export(self, fp: TextIO) -> None:
+        """Write the game as JSON to fp one turn at a time, never holding the whole document"""
+        fp.write('{"turns": [')
+        for i, turn in enumerate(self.turns):
+            if i:
+                fp.write(', ')
+            json.dump(turn.to_dict(), fp)
+        fp.write(']}')
+    
+    def export_game_data(self) -> str:
+        """The game as a JSON string"""
+        buffer = io.StringIO()
+        self.stream_export(buffer)
+        return buffer.getvalue()
\ No newline at end of file
@@ -0,0 +1,24 @@
+import asyncio
+from typing import List, Sequence
+
+from .game import InfiniteContractGame
+
+class GameRunner:
+    """Plays many games in lockstep so each turn's agent requests go out together"""
+
+    def __init__(self, concurrency: int = 8):
+        # Upper bound on agent requests in flight at once (e.g. a provider rate limit)
+        self.concurrency = concurrency
+
+    async def run_many(self, games: Sequence[InfiniteContractGame]) -> None:
+        """Play every game until it is won or its history reaches max_turns"""
+        limiter = asyncio.Semaphore(self.concurrency)
+        active: List[InfiniteContractGame] = [
+            game for game in games if len(game.history.turns) < game.config.max_turns
+        ]
+        while active:
+            still_playing = await asyncio.gather(*(game.play_turn_async(limiter) for game in active))
+            active = [
+                game for game, playing in zip(active, still_playing)
+                if playing and len(game.history.turns) < game.config.max_turns
+            ]
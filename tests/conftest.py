@@ -0,0 +1,9 @@
+import pytest
+from src.core.game import InfiniteContractGame
+from helpers import create_test_game
+
+@pytest.fixture
+def game() -> InfiniteContractGame:
+    game = create_test_game()
+    game.available_cards = game._get_available_cards()
+    return game
@@ -0,0 +1,51 @@
+import functools
+import random
+from typing import Optional, Type
+from src.core.game import InfiniteContractGame, GameConfig
+from src.core.cards import CardLibrary, CardType
+from src.agents.base_agent import BaseAgent
+
+class TestAgent(BaseAgent):
+    __test__ = False
+
+    def __init__(self, name: str, victory_condition: str, fixed_card_number: int = 1):
+        super().__init__(name)
+        self.victory_condition = victory_condition
+        self.fixed_card_number = fixed_card_number
+
+    def get_response(self, prompt: str) -> str:
+        return f"""
+SCRATCH PAD:
+Testing card {self.fixed_card_number}
+
+SELECTED CARD: {self.fixed_card_number}
+"""
+
+@functools.lru_cache(maxsize=1)
+def card_library() -> CardLibrary:
+    """Card definitions are static, so tests share one library"""
+    return CardLibrary()
+
+def create_test_game(victory_condition: str = "x >= 5",
+                    agent1_card: int = 1,
+                    agent2_card: int = 1,
+                    max_turns: int = 10,
+                    memory_window: int = 5,
+                    rng: Optional[random.Random] = None,
+                    response_cache: Optional[dict] = None,
+                    agent_class: Type[TestAgent] = TestAgent,
+                    **agent_kwargs) -> InfiniteContractGame:
+    """Build a two-player game; extra keyword arguments go to both agents"""
+    config = GameConfig(
+        max_turns=max_turns,
+        memory_window=memory_window,
+        card_library=card_library(),
+        get_allowed_cards=lambda target_var: list(CardType),
+        cards_per_turn=3,
+        response_cache=response_cache
+    )
+
+    agent1 = agent_class("Player 1", victory_condition, agent1_card, **agent_kwargs)
+    agent2 = agent_class("Player 2", victory_condition, agent2_card, **agent_kwargs)
+
+    return InfiniteContractGame(agent1, agent2, config, rng=rng)
@@ -1,38 +1,8 @@
+import random
 import pytest
-from src.core.game import InfiniteContractGame, GameConfig
-from src.core.cards import CardLibrary, CardType, Card
-from src.agents.base_agent import BaseAgent
-
-class TestAgent(BaseAgent):
-    def __init__(self, name: str, victory_condition: str, fixed_card_number: int = 1):
-        super().__init__(name)
-        self.victory_condition = victory_condition
-        self.fixed_card_number = fixed_card_number
-
-    def get_response(self, prompt: str) -> str:
-        return f"""
-SCRATCH PAD:
-Testing card {self.fixed_card_number}
-
-SELECTED CARD: {self.fixed_card_number}
-"""
-
-def create_test_game(victory_condition: str = "x >= 5", 
-                    agent1_card: int = 1, 
-                    agent2_card: int = 1) -> InfiniteContractGame:
-    config = GameConfig(
-        max_turns=10,
-        memory_window=5,
-        card_library=CardLibrary(),
-        allowed_card_types=[CardType.AGGRESSIVE, CardType.DEFENSIVE, 
-                          CardType.STRATEGIC, CardType.UTILITY],
-        cards_per_turn=3
-    )
-    
-    agent1 = TestAgent("Player 1", victory_condition, agent1_card)
-    agent2 = TestAgent("Player 2", victory_condition, agent2_card)
-    
-    return InfiniteContractGame(agent1, agent2, config)
+from src.core.contract import CodeContract
+from src.core.cards import CardLibrary, CardType
+from helpers import card_library, create_test_game
 
 def test_card_library_initialization():
     library = CardLibrary()
@@ -41,42 +11,68 @@ def test_card_library_initialization():
         cards = library.get_cards_by_type(card_type)
         assert len(cards) > 0, f"No cards found for type {card_type}"
 
-@pytest.mark.parametrize("card_id,victory_condition,expected_vars", [
+@pytest.mark.parametrize("card_id,expected_vars", [
     # Basic operations on x
-    ("op_increment_x", "x >= 10", {"x": 2, "y": 1, "z": 1}),  # 1 + 1 = 2
-    ("op_decrement_x", "x >= 10", {"x": 0, "y": 1, "z": 1}),  # 1 - 1 = 0
-    ("op_double_x", "x >= 10", {"x": 2, "y": 1, "z": 1}),     # 1 * 2 = 2
-    ("op_halve_x", "x >= 10", {"x": 0, "y": 1, "z": 1}),      # 1 // 2 = 0
+    ("op_increment_x", {"x": 2, "y": 1, "z": 1}),  # 1 + 1 = 2
+    ("op_decrement_x", {"x": 0, "y": 1, "z": 1}),  # 1 - 1 = 0
+    ("op_double_x", {"x": 2, "y": 1, "z": 1}),     # 1 * 2 = 2
+    ("op_halve_x", {"x": 0, "y": 1, "z": 1}),      # 1 // 2 = 0
     
     # Transfer operations
-    ("transfer_x_to_y", "x >= 10", {"x": 1, "y": 1, "z": 1}),
-    ("transfer_y_to_x", "x >= 10", {"x": 1, "y": 1, "z": 1}),
-    ("transfer_x_to_z", "x >= 10", {"x": 1, "y": 1, "z": 1}),
-    ("transfer_z_to_x", "x >= 10", {"x": 1, "y": 1, "z": 1}),
-    ("transfer_z_to_y", "x >= 10", {"x": 1, "y": 1, "z": 1}),
+    ("transfer_x_to_y", {"x": 1, "y": 1, "z": 1}),
+    ("transfer_y_to_x", {"x": 1, "y": 1, "z": 1}),
+    ("transfer_x_to_z", {"x": 1, "y": 1, "z": 1}),
+    ("transfer_z_to_x", {"x": 1, "y": 1, "z": 1}),
+    ("transfer_z_to_y", {"x": 1, "y": 1, "z": 1}),
     
     # Utility operations
-    ("util_reset_z", "x >= 10", {"x": 1, "y": 1, "z": 0}),  # Only z gets reset to 0
+    ("util_reset_z", {"x": 1, "y": 1, "z": 0}),  # Only z gets reset to 0
 ])
-def test_individual_card_execution(card_id, victory_condition, expected_vars):
-    library = CardLibrary()
+def test_individual_card_execution(card_id, expected_vars):
+    library = card_library()
     card = library.get_card(card_id)
     assert card is not None, f"Card {card_id} not found"
     
-    # Create a game instance with initial state and victory condition
-    game = create_test_game(victory_condition=victory_condition)
+    # Card math only needs a fresh contract, not a whole game
+    contract = CodeContract()
     
     # Apply the card
-    game.contract.apply_card(card)
+    contract.apply_card(card)
     
     # Check if variables match expected values
     for var, expected_value in expected_vars.items():
-        assert game.contract.variables[var] == expected_value, \
-            f"Card {card_id}: {var} expected {expected_value}, got {game.contract.variables[var]}"
+        assert contract.variables[var] == expected_value, \
+            f"Card {card_id}: {var} expected {expected_value}, got {contract.variables[var]}"
+
+@pytest.mark.parametrize("code", [
+    "import os",
+    "from os import path",
+    "__import__('os')",
+    "x = __builtins__['open']",
+    "eval('x + 1')",
+    "globals()['x'] = 100",
+    "x = x.__class__",
+    "[(w := 7) for _ in (1,)]",
+    "x = sum((w := i) for i in (1, 2))",
+])
+def test_unsafe_code_rejected(code):
+    contract = CodeContract()
+    
+    assert not contract.add_line(code)
+    assert contract.current_code == ()
+    assert contract.variables == {"x": 1, "y": 1, "z": 1}
+
+def test_contracts_do_not_share_names():
+    first = CodeContract()
+    first.add_line("[(w := 7) for _ in (1,)]")
+    
+    second = CodeContract()
+    assert not second.add_line("x = w")
+    assert second.variables["x"] == 1
 
 def test_contract_manipulation_cards():
     game = create_test_game()
-    library = CardLibrary()
+    library = card_library()
     
     # Test pop operation
     increment_card = library.get_card("op_increment_x")
@@ -89,8 +85,7 @@ def test_contract_manipulation_cards():
     
     # Test clear operation
     clear_card = library.get_card("util_clear")
-    game.contract.apply_card(increment_card)
-    game.contract.apply_card(increment_card)
+    game.contract.apply_cards([increment_card] * 2)
     assert len(game.contract.current_code) == 2
     game.contract.apply_card(clear_card)
     assert len(game.contract.current_code) == 0
@@ -101,32 +96,30 @@ def test_contract_manipulation_cards():
     
     game.contract.apply_card(increment_card)  # x += 1 (x becomes 2)
     game.contract.apply_card(transfer_card)   # y = x
-    original_order = game.contract.execution_order.copy()
+    original_order = tuple(game.contract.execution_order)
     game.contract.apply_card(invert_card)
-    assert game.contract.execution_order != original_order
+    assert tuple(game.contract.execution_order) == original_order[::-1]
     
     # Verify the inversion actually changes execution behavior
     assert game.contract.variables["y"] == 1  # y should be 1 because x=1 when y=x is executed first
 
 def test_card_availability():
-    game = create_test_game(victory_condition="x >= 10")
+    game = create_test_game(victory_condition="x >= 10", rng=random.Random(0))
     
-    # Play multiple turns and verify that cards are being randomly selected
+    # Deal several hands from the game's seeded generator and verify that cards are being randomly selected
     seen_cards = set()
     for _ in range(10):
-        prompt = game.create_turn_prompt()
-        cards_section = prompt.split("Available Cards:")[1].split("Your Strategy Notes")[0]
-        seen_cards.update(cards_section.strip().split('\n'))
+        seen_cards.update(card.id for card in game._get_available_cards())
     
     # Check if we've seen a good variety of cards
     assert len(seen_cards) > 5, "Not enough variety in card selection"
 
 def test_card_categorization_by_goal():
-    library = CardLibrary()
+    library = card_library()
     
     # Test when goal is to increase x
     increment_x = library.get_card("op_increment_x")
-    assert increment_x.card_type == CardType.AGGRESSIVE
+    assert increment_x.card_type == CardType.AGGRESSIVE_X
     
     # Test utility cards are always utility
     clear_card = library.get_card("util_clear")
@@ -139,14 +132,13 @@ def test_card_categorization_by_goal():
 def test_victory_condition():
     # Test game with x >= 5 victory condition
     game = create_test_game(victory_condition="x >= 5")
-    library = CardLibrary()
+    library = card_library()
     
     # Get increment card
     increment_card = library.get_card("op_increment_x")
     
     # Apply card multiple times to exceed victory condition
-    for _ in range(6):  # x will go from 1 to 7
-        game.contract.apply_card(increment_card)
+    game.contract.apply_cards([increment_card] * 6)  # x will go from 1 to 7
     
     # Check if victory condition is detected
     assert game.contract.check_victory_condition("x >= 5")
@@ -156,7 +148,25 @@ def test_victory_condition():
     decrement_y = library.get_card("op_decrement_y")
     
     # Apply card multiple times to exceed victory condition
-    for _ in range(4):  # y will go from 1 to -3
-        game.contract.apply_card(decrement_y)
+    game.contract.apply_cards([decrement_y] * 4)  # y will go from 1 to -3
+    
+    assert game.contract.check_victory_condition("y <= -3")
+
+@pytest.mark.parametrize("code,condition,expected", [
+    ("x = 6", "x >= 5 and y == 1", True),
+    ("x = 6", "x >= 5 and y > 1", False),
+    ("x = 0", "x >= 5 or y <= 1", True),
+    ("x = 0", "x >= 5 or y < 1", False),
+    ("del x", "x >= 5", False),
+    ("x = []", "x >= 5", False),
+    ("x = []", "y == 1 or x >= 5", True),
+    ("x = 6", "x >= 5 and (y == 1 or z == 2)", True),
+    ("x = 6", "x >= 5 or y", False),
+    ("x = 6", "x or y", False),
+    ("x = 6", "x", False),
+])
+def test_victory_condition_evaluation(code, condition, expected):
+    contract = CodeContract()
+    assert contract.add_line(code)
     
-    assert game.contract.check_victory_condition("y <= -3")
\ No newline at end of file
+    assert contract.check_victory_condition(condition) is expected
@@ -0,0 +1,194 @@
+import asyncio
+import random
+import pytest
+from src.core.game import InfiniteContractGame, run_games_async
+from src.core.runner import GameRunner
+from src.core.cards import Card, CardType
+from src.core.history import Variables
+from helpers import TestAgent, card_library, create_test_game
+
+@pytest.mark.parametrize("payload,match", [
+    ("SCRATCH PAD:\nNo card picked", "No 'SELECTED CARD:' section found"),
+    ("SCRATCH PAD:\nThinking\n\nSELECTED CARD: two", "Invalid response format"),
+    ("SCRATCH PAD:\nThinking\n\nSELECTED CARD: 99", "out of valid range"),
+])
+def test_invalid_response_handling(game, payload, match):
+    with pytest.raises(ValueError, match=match):
+        game._parse_response(payload)
+
+@pytest.mark.parametrize("payload,scratch_pad", [
+    ("SCRATCH PAD:\nThinking\n\nSELECTED CARD: [2]", "Thinking"),
+    ("Scratch pad: Thinking\nselected card: **2**", "Thinking"),
+    ("SCRATCHPAD: Thinking\nSELECTED  CARD:2", "Thinking"),
+    ("SCRATCH PAD:\nThinking\n\n**SELECTED CARD:** 2", "Thinking"),
+    ("SCRATCH PAD:\nLast turn my selected card: 3 failed\n\nSELECTED CARD: 2",
+     "Last turn my selected card: 3 failed"),
+    ("SCRATCH PAD:\nSELECTED CARD: 3 looked good\nbut no\nSELECTED CARD: 2",
+     "SELECTED CARD: 3 looked good\nbut no"),
+    ("SELECTED CARD: 2", ""),
+    ("SCRATCH PAD: think. SELECTED CARD: 2", "think."),
+    ("SCRATCH PAD:\nThinking\nMy answer - SELECTED CARD: 2", "Thinking\nMy answer -"),
+])
+def test_response_format_variations(game, payload, scratch_pad):
+    assert game._parse_response(payload) == (scratch_pad, 2)
+
+@pytest.mark.parametrize("code,recorded_x", [("del x", None), ("x = []", [])])
+def test_turn_with_unusable_variable(code, recorded_x):
+    game = create_test_game(victory_condition="x >= 5")
+    game.available_cards = [Card("test_card", "Test Card", "", code, CardType.UTILITY, 1)]
+    
+    assert game._apply_turn("SELECTED CARD: 1")
+    assert game.history.turns[-1].variables == Variables(recorded_x, 1, 1)
+
+class CountingAgent(TestAgent):
+    def __init__(self, name: str, victory_condition: str, fixed_card_number: int = 1):
+        super().__init__(name, victory_condition, fixed_card_number)
+        self.calls = 0
+
+    def get_response(self, prompt: str) -> str:
+        self.calls += 1
+        return super().get_response(prompt)
+
+def test_response_cache_hit():
+    cache = {}
+    first = create_test_game("x >= 100", rng=random.Random(0), response_cache=cache,
+                             agent_class=CountingAgent)
+    first.play_turn()
+    assert first.agents_list[0].calls == 1
+    assert len(cache) == 1
+    
+    # Same seed, so the second game reaches the same state and replays the answer
+    second = create_test_game("x >= 100", rng=random.Random(0), response_cache=cache,
+                              agent_class=CountingAgent)
+    second.play_turn()
+    assert second.agents_list[0].calls == 0
+    assert second.history.turns[0].variables == first.history.turns[0].variables
+    assert second.history.turns[0].success
+
+def test_response_cache_remaps_card_number():
+    library = card_library()
+    increment, decrement, double = (library.get_card(card_id) for card_id in
+                                    ("op_increment_x", "op_decrement_x", "op_double_x"))
+    cache = {}
+    first = create_test_game("x >= 100", rng=random.Random(0), response_cache=cache,
+                             agent_class=CountingAgent)
+    first.available_cards = [increment, decrement, double]
+    first._apply_turn("SCRATCH PAD:\nDecrease\n\nSELECTED CARD: 2", first._response_cache_key())
+    
+    second = create_test_game("x >= 100", rng=random.Random(0), response_cache=cache,
+                              agent_class=CountingAgent)
+    second.available_cards = [double, increment, decrement]
+    response = second._cached_response(second._response_cache_key())
+    assert second._parse_response(response) == ("Decrease", 3)
+
+def test_response_cache_miss_when_card_not_in_hand():
+    cache = {}
+    game = create_test_game("x >= 100", rng=random.Random(0), response_cache=cache,
+                            agent_class=CountingAgent)
+    game.available_cards = game._get_available_cards()
+    cache_key = game._response_cache_key()
+    cache[cache_key] = ("Stale", "Not A Card")
+    
+    assert game._cached_response(cache_key) is None
+
+def test_response_cache_skips_failed_cards():
+    cache = {}
+    game = create_test_game("x >= 100", rng=random.Random(0), response_cache=cache,
+                            agent_class=CountingAgent)
+    game.available_cards = [Card("test_card", "Broken", "", "x = w", CardType.UTILITY, 1)]
+    game._apply_turn("SELECTED CARD: 1", game._response_cache_key())
+    
+    assert not game.history.turns[0].success
+    assert cache == {}
+
+def test_response_cache_key_includes_model():
+    game = create_test_game("x >= 100", rng=random.Random(0), response_cache={},
+                            agent_class=CountingAgent)
+    game.available_cards = game._get_available_cards()
+    agent = game.current_agent
+    agent.model = "model-a"
+    first_key = game._response_cache_key()
+    agent.model = "model-b"
+    
+    assert game._response_cache_key() != first_key
+
+def _turn_summary(game: InfiniteContractGame):
+    return [(t.turn_number, t.player_name, t.selected_card, t.variables) for t in game.history.turns]
+
+def test_run_games_async():
+    games = [
+        create_test_game("x >= 100", agent2_card=2, max_turns=4, rng=random.Random(1)),
+        create_test_game("x >= 100", agent2_card=3, max_turns=6, rng=random.Random(2)),
+    ]
+    # Satisfied from the start, so this game ends after its first turn
+    won = create_test_game("x >= -100", max_turns=5, rng=random.Random(3))
+    asyncio.run(run_games_async(games + [won]))
+    assert len(won.history.turns) == 1
+    
+    # The same games played synchronously end in the same histories
+    for game, seed, card, max_turns in zip(games, (1, 2), (2, 3), (4, 6)):
+        expected = create_test_game("x >= 100", agent2_card=card, max_turns=max_turns,
+                                    rng=random.Random(seed))
+        while len(expected.history.turns) < max_turns and expected.play_turn():
+            pass
+        assert len(game.history.turns) == max_turns
+        assert [t.player_name for t in game.history.turns] == ["agent1", "agent2"] * (max_turns // 2)
+        assert _turn_summary(game) == _turn_summary(expected)
+
+class InFlightCounter:
+    def __init__(self):
+        self.current = 0
+        self.peak = 0
+
+class SlowAgent(TestAgent):
+    """Answers after yielding to the event loop, recording how many answers overlap"""
+    def __init__(self, name: str, victory_condition: str, fixed_card_number: int = 1,
+                 counter: InFlightCounter = None, delay: float = 0.001):
+        super().__init__(name, victory_condition, fixed_card_number)
+        self.counter = counter
+        self.delay = delay
+
+    async def get_response_async(self, prompt: str) -> str:
+        self.counter.current += 1
+        self.counter.peak = max(self.counter.peak, self.counter.current)
+        await asyncio.sleep(self.delay)
+        self.counter.current -= 1
+        return self.get_response(prompt)
+
+def test_game_runner():
+    counter = InFlightCounter()
+    games = [create_test_game("x >= 100", max_turns=max_turns, rng=random.Random(0),
+                              agent_class=SlowAgent, counter=counter)
+             for max_turns in (2, 4, 4, 6)]
+    won = create_test_game("x >= -100", max_turns=6, rng=random.Random(0),
+                           agent_class=SlowAgent, counter=counter)
+    asyncio.run(GameRunner(concurrency=2).run_many(games + [won]))
+    
+    assert counter.peak == 2
+    assert [len(game.history.turns) for game in games] == [2, 4, 4, 6]
+    assert len(won.history.turns) == 1
+
+def test_run_games_async_independent_games():
+    counter = InFlightCounter()
+    slow = create_test_game("x >= 100", max_turns=2, rng=random.Random(0),
+                            agent_class=SlowAgent, counter=counter, delay=0.05)
+    fast = [create_test_game("x >= 100", max_turns=6, rng=random.Random(0),
+                             agent_class=SlowAgent, counter=counter, delay=0)
+            for _ in range(3)]
+    asyncio.run(run_games_async([slow] + fast, concurrency=2))
+    
+    assert counter.peak == 2
+    assert [len(game.history.turns) for game in fast] == [6, 6, 6]
+    # Fast games do not wait for the slow agent between turns
+    assert all(game.history.turns[-1].timestamp < slow.history.turns[0].timestamp for game in fast)
+
+def test_strategy_notes_window():
+    game = create_test_game(memory_window=5)
+    agent1 = game.current_agent
+    for i in range(8):
+        agent1.add_strategy_note(f"note {i}")
+    
+    notes = game._dynamic_user_block().partition("Your Strategy Notes:\n")[2].partition("\n\n")[0]
+    assert notes.split("\n") == [f"note {i}" for i in range(3, 8)]
+    # The game only limits what is shown; the agent keeps every note for later games
+    assert len(agent1.strategy_notes) == 8
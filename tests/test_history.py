@@ -0,0 +1,53 @@
+import json
+from datetime import datetime
+import pytest
+from src.core.history import GameHistory, Variables
+from helpers import create_test_game
+
+def test_history_columns():
+    history = GameHistory()
+    history.add_turn(1, "agent1", "", 2, ("x += 1",), Variables(2, 1, 1))
+    history.add_turn(2, "agent2", "", 1, ("x += 1", "x = 0.5"), Variables(0.5, 1, 1))
+    history.add_turn(3, "agent1", "", 3, ("x += 1", "x = 0.5", "y = 2 ** 70"), Variables(0.5, 2 ** 70, 1))
+    
+    columns = history.columns()
+    assert columns['turn_number'].typecode == 'i' and list(columns['turn_number']) == [1, 2, 3]
+    assert columns['x'] == [2, 0.5, 0.5]
+    assert columns['y'] == [1, 1, 2 ** 70]
+    assert columns['z'].typecode == 'q' and list(columns['z']) == [1, 1, 1]
+
+def test_history_columns_match_turns():
+    game = create_test_game(victory_condition="x >= 100", agent2_card=99)
+    for _ in range(6):
+        game.play_turn()
+    
+    turns = game.history.turns
+    columns = game.history.columns()
+    assert all(len(column) == len(turns) for column in columns.values())
+    assert [game.history.player_names[i] for i in columns['player_id']] == [t.player_name for t in turns]
+    assert list(columns['selected_card']) == [t.selected_card or 0 for t in turns]
+    assert [bool(s) for s in columns['success']] == [t.success for t in turns]
+    assert list(columns['x']) == [t.variables.x for t in turns]
+
+@pytest.mark.parametrize("record_timestamps", [True, False])
+def test_export_game_data(record_timestamps):
+    history = GameHistory(record_timestamps=record_timestamps)
+    history.add_turn(1, "agent1", "SELECTED CARD: 1", 1, ("x += 1",), Variables(2, 1, 1))
+    history.add_turn(2, "agent2", "No card", None, ("x += 1",), Variables(2, 1, 1), success=False)
+    
+    data = json.loads(history.export_game_data())
+    assert len(data["turns"]) == 2
+    assert data["turns"] == [turn.to_dict() for turn in history.turns]
+    
+    first, second = data["turns"]
+    assert first["player_name"] == "agent1"
+    assert first["selected_card"] == 1
+    assert first["contract_state"] == ["x += 1"]
+    assert first["variables"] == {"x": 2, "y": 1, "z": 1}
+    assert first["success"] is True
+    assert second["selected_card"] is None
+    assert second["success"] is False
+    if record_timestamps:
+        assert datetime.fromisoformat(first["timestamp"]) == history.turns[0].timestamp
+    else:
+        assert first["timestamp"] is None and second["timestamp"] is None